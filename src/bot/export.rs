@@ -1,3 +1,6 @@
+use std::borrow::Cow;
+use std::fmt::Write;
+
 use crate::dal::RecentSpending;
 
 use super::format::parse_year_month;
@@ -29,21 +32,30 @@ pub(super) fn export_month_options(current_ym: &str) -> Vec<(String, bool)> {
     out
 }
 
-fn csv_escape(s: &str) -> String {
-    if s.contains(',') || s.contains('"') || s.contains('\n') || s.contains('\r') {
-        format!("\"{}\"", s.replace('"', "\"\""))
+/// Quotes `s` only when it needs it, so the common case borrows instead of
+/// allocating.
+fn csv_escape(s: &str) -> Cow<'_, str> {
+    if s.contains([',', '"', '\n', '\r']) {
+        Cow::Owned(format!("\"{}\"", s.replace('"', "\"\"")))
     } else {
-        s.to_string()
+        Cow::Borrowed(s)
     }
 }
 
+/// Rough per-row size used to presize the output: a timestamp, an amount and
+/// six short text fields.
+const CSV_ROW_ESTIMATE: usize = 128;
+
 pub(super) fn build_csv(items: &[RecentSpending]) -> String {
-    let mut out = String::from("Timestamp,Amount,Currency,Category,Account,IBAN,Reporter,Notes\n");
+    const HEADER: &str = "Timestamp,Amount,Currency,Category,Account,IBAN,Reporter,Notes\n";
+    let mut out = String::with_capacity(HEADER.len() + items.len() * CSV_ROW_ESTIMATE);
+    out.push_str(HEADER);
     for s in items {
         let notes = s.notes.as_deref().unwrap_or("");
         let iban = s.account_iban.as_deref().unwrap_or("");
-        out.push_str(&format!(
-            "{},{:.2},{},{},{},{},{},{}\n",
+        let _ = writeln!(
+            out,
+            "{},{:.2},{},{},{},{},{},{}",
             csv_escape(&s.created_at),
             s.amount,
             csv_escape(&s.currency_code),
@@ -52,7 +64,7 @@ pub(super) fn build_csv(items: &[RecentSpending]) -> String {
             csv_escape(iban),
             csv_escape(&s.reporter_name),
             csv_escape(notes),
-        ));
+        );
     }
     out
 }
@@ -114,6 +126,11 @@ mod tests {
         assert_eq!(csv_escape("line1\nline2"), "\"line1\nline2\"");
     }
 
+    #[test]
+    fn test_csv_escape_plain_borrows() {
+        assert!(matches!(csv_escape("hello"), Cow::Borrowed(_)));
+    }
+
     #[test]
     fn test_build_csv_header_and_rows() {
         let items = vec![
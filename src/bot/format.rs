@@ -1,3 +1,5 @@
+use std::fmt::Write;
+
 use crate::dal::{Account, Category, Currency, RecentSpending, User};
 
 use super::keyboards;
@@ -41,6 +43,12 @@ pub(super) fn format_month_label(year_month: &str, is_current: bool) -> String {
     }
 }
 
+/// `trim_end` that reuses the builder's buffer instead of copying the message.
+fn into_trimmed(mut out: String) -> String {
+    out.truncate(out.trim_end().len());
+    out
+}
+
 fn html_escape(s: &str) -> String {
     s.replace('&', "&amp;")
         .replace('<', "&lt;")
@@ -66,13 +74,14 @@ pub(super) fn format_recent_spendings(items: &[RecentSpending]) -> String {
             if current_date.is_some() {
                 out.push('\n');
             }
-            out.push_str(&format!("<b>{}</b>\n", html_escape(date)));
+            let _ = writeln!(out, "<b>{}</b>", html_escape(date));
             current_date = Some(date);
         }
         let cat = keyboards::format_category(&s.category_name);
         let when = if time.is_empty() { date } else { time.as_str() };
-        out.push_str(&format!(
-            "{}. {} — {:.2} {} — {} — {} — {}\n",
+        let _ = writeln!(
+            out,
+            "{}. {} — {:.2} {} — {} — {} — {}",
             i + 1,
             html_escape(when),
             s.amount,
@@ -80,44 +89,40 @@ pub(super) fn format_recent_spendings(items: &[RecentSpending]) -> String {
             html_escape(&cat),
             html_escape(&s.account_name),
             html_escape(&s.reporter_name),
-        ));
+        );
         if let Some(note) = s.notes.as_deref().filter(|n| !n.is_empty()) {
-            out.push_str(&format!("   📝 {}\n", html_escape(note)));
+            let _ = writeln!(out, "   📝 {}", html_escape(note));
         }
     }
-    out.trim_end().to_string()
+    into_trimmed(out)
 }
 
 pub(super) fn format_users(users: &[User]) -> String {
     let mut out = String::from("👥 Пользователи\n\n");
     for u in users {
         if u.is_admin {
-            out.push_str(&format!("• {} 👑 admin\n", u.name));
+            let _ = writeln!(out, "• {} 👑 admin", u.name);
         } else {
-            out.push_str(&format!("• {}\n", u.name));
+            let _ = writeln!(out, "• {}", u.name);
         }
     }
-    out.trim_end().to_string()
+    into_trimmed(out)
 }
 
 pub(super) fn format_currencies(currencies: &[Currency]) -> String {
     let mut out = String::from("💱 Валюты\n\n");
     for c in currencies {
-        out.push_str(&format!("• {}\n", c.currency_code));
+        let _ = writeln!(out, "• {}", c.currency_code);
     }
-    out.trim_end().to_string()
+    into_trimmed(out)
 }
 
 pub(super) fn format_categories(categories: &[Category]) -> String {
     let mut out = String::from("📋 Категории\n\n");
     for (i, c) in categories.iter().enumerate() {
-        out.push_str(&format!(
-            "{}. {}\n",
-            i + 1,
-            keyboards::format_category(&c.name)
-        ));
+        let _ = writeln!(out, "{}. {}", i + 1, keyboards::format_category(&c.name));
     }
-    out.trim_end().to_string()
+    into_trimmed(out)
 }
 
 pub(super) fn format_accounts(
@@ -143,21 +148,22 @@ pub(super) fn format_accounts(
         if owned.is_empty() {
             continue;
         }
-        out.push_str(&format!("👤 {}\n", u.name));
+        let _ = writeln!(out, "👤 {}", u.name);
         for a in owned {
             let default_mark = if u.default_account_id == Some(a.id) {
                 " ⭐ по умолчанию"
             } else {
                 ""
             };
-            out.push_str(&format!(
-                "• {} — {}{}\n",
+            let _ = writeln!(
+                out,
+                "• {} — {}{}",
                 a.name,
                 code_of(a.currency_id),
                 default_mark
-            ));
+            );
             if let Some(iban) = &a.iban {
-                out.push_str(&format!("  IBAN: {}\n", iban));
+                let _ = writeln!(out, "  IBAN: {}", iban);
             }
         }
         out.push('\n');
@@ -167,14 +173,14 @@ pub(super) fn format_accounts(
     if !unassigned.is_empty() {
         out.push_str("❓ Без владельца\n");
         for a in unassigned {
-            out.push_str(&format!("• {} — {}\n", a.name, code_of(a.currency_id)));
+            let _ = writeln!(out, "• {} — {}", a.name, code_of(a.currency_id));
             if let Some(iban) = &a.iban {
-                out.push_str(&format!("  IBAN: {}\n", iban));
+                let _ = writeln!(out, "  IBAN: {}", iban);
             }
         }
     }
 
-    out.trim_end().to_string()
+    into_trimmed(out)
 }
 
 #[cfg(test)]
@@ -228,12 +234,10 @@ mod tests {
             Category {
                 id: 1,
                 name: "Продукты и хозтовары".into(),
-                sort_order: 0,
             },
             Category {
                 id: 2,
                 name: "Другое".into(),
-                sort_order: 1,
             },
         ];
         let out = format_categories(&categories);
@@ -1,7 +1,7 @@
 use std::sync::Arc;
 
 use teloxide::prelude::*;
-use teloxide::types::{InputFile, MessageId, ParseMode};
+use teloxide::types::{InlineKeyboardMarkup, InputFile, MessageId, ParseMode};
 
 use crate::dal::Db;
 use crate::domain::{DraftKey, DraftMode, DraftStore, EditState, SpendingDraft};
@@ -16,6 +16,24 @@ use super::keyboards;
 
 const RECENT_LIMIT: i64 = 25;
 
+// Fixed reply texts. Messages that interpolate data stay inline at the call site.
+const HELP_TEXT: &str = "Отправьте сумму (число), чтобы начать запись расхода.";
+const UNKNOWN_COMMAND_TEXT: &str = "Неизвестная команда. Команды доступны в меню.";
+const NO_DEFAULT_ACCOUNT_PROMPT: &str = "Счёт по умолчанию не выбран.\n\nВыберите счёт:";
+const EXPORT_PROMPT: &str = "📤 Выберите месяц для экспорта:";
+const SPENDING_NOT_FOUND_TEXT: &str = "Транзакция не найдена.";
+const ACCOUNT_NOT_FOUND_TEXT: &str = "Счёт не найден. Счёт по умолчанию не изменён.";
+const NO_DRAFT_TEXT: &str = "Нет активного черновика. Отправьте сумму.";
+const ENTER_AMOUNT_PROMPT: &str = "Введите новую сумму:";
+const CHOOSE_CATEGORY_PROMPT: &str = "Выберите категорию:";
+const CHOOSE_ACCOUNT_PROMPT: &str = "Выберите счёт:";
+const ENTER_NOTE_PROMPT: &str = "Введите заметку:";
+const CANCELLED_TEXT: &str = "❌ Расход отменён.";
+const CONFIRM_DELETE_PROMPT: &str = "🗑 Удалить эту транзакцию?";
+const DELETED_TEXT: &str = "🗑 Транзакция удалена.";
+const SAVED_HEADER: &str = "✅ Сохранено!";
+const UPDATED_HEADER: &str = "✅ Изменено!";
+
 type HandlerResult = Result<(), Box<dyn std::error::Error + Send + Sync>>;
 
 #[derive(Debug, PartialEq)]
@@ -26,22 +44,52 @@ enum MessageAction {
     AmountInput(DraftKey, f64),
     /// User sent text while a draft is in EnteringNote — treat as note for that draft.
     NoteInput(DraftKey),
+    /// `/`-prefixed text that is not a known command — say so rather than
+    /// saving it as a note or answering with help.
+    UnknownCommand,
     /// Nothing actionable — show help.
     ShowHelp,
 }
 
+/// Longest text still tried as an amount; anything longer goes straight to
+/// the non-amount branches.
+const MAX_AMOUNT_LEN: usize = 32;
+
+/// Parses a positive amount, accepting `,` as the decimal separator. Runs on
+/// every incoming message, so the `,` -> `.` rewrite is a single pass into a
+/// stack buffer rather than a heap-allocated copy, and is skipped entirely for
+/// the common inputs that have no `,` (plain integers, `.` decimals).
+fn parse_amount(text: &str) -> Option<f64> {
+    // Quit early on chat text. Requiring a digit also keeps `f64::from_str`'s
+    // "inf" / "NaN" spellings from being taken as amounts.
+    if text.len() > MAX_AMOUNT_LEN || !text.bytes().any(|b| b.is_ascii_digit()) {
+        return None;
+    }
+    let parsed = if text.contains(',') {
+        let mut buf = [0u8; MAX_AMOUNT_LEN];
+        let buf = &mut buf[..text.len()];
+        for (dst, &b) in buf.iter_mut().zip(text.as_bytes()) {
+            *dst = if b == b',' { b'.' } else { b };
+        }
+        // Swapping one ASCII byte for another keeps the UTF-8 valid.
+        std::str::from_utf8(buf).ok()?.parse::<f64>()
+    } else {
+        text.parse::<f64>()
+    };
+    parsed.ok().filter(|v| v.is_finite() && *v > 0.0)
+}
+
 fn classify_input(
     text: &str,
     amount_draft_key: Option<DraftKey>,
     note_draft_key: Option<DraftKey>,
 ) -> MessageAction {
-    let parsed: Option<f64> = text
-        .replace(',', ".")
-        .parse::<f64>()
-        .ok()
-        .filter(|v| *v > 0.0);
-
-    match parsed {
+    // Known commands are handled before this, so anything `/`-prefixed here
+    // is unknown.
+    if text.starts_with('/') {
+        return MessageAction::UnknownCommand;
+    }
+    match parse_amount(text) {
         Some(amount) => match amount_draft_key {
             Some(key) => MessageAction::AmountInput(key, amount),
             None => MessageAction::NewAmount(amount),
@@ -148,6 +196,17 @@ fn draft_key(chat_id: ChatId, msg_id: MessageId) -> DraftKey {
     (chat_id.0, msg_id.0)
 }
 
+/// Summary keyboard for `draft`; Delete is only offered when editing an existing spending.
+fn summary_markup(d: &DraftDisplay, draft: &SpendingDraft) -> InlineKeyboardMarkup {
+    keyboards::summary_keyboard(
+        &d.amount_label,
+        &d.category_label,
+        &d.account_label,
+        draft.notes.as_deref(),
+        matches!(draft.mode, DraftMode::Editing(_)),
+    )
+}
+
 /// Re-renders the draft summary message in place. Shared by every callback / message
 /// branch that mutates the draft and needs the UI to reflect the new state.
 async fn rerender_draft_summary(
@@ -160,17 +219,30 @@ async fn rerender_draft_summary(
     let d = build_draft_display(draft, db);
     bot.edit_message_text(chat_id, msg_id, &d.summary_text)
         .parse_mode(ParseMode::Html)
-        .reply_markup(keyboards::summary_keyboard(
-            &d.amount_label,
-            &d.category_label,
-            &d.account_label,
-            draft.notes.as_deref(),
-            matches!(draft.mode, DraftMode::Editing(_)),
-        ))
+        .reply_markup(summary_markup(&d, draft))
         .await?;
     Ok(())
 }
 
+/// Sends a new summary message for `draft` and stores the draft keyed by it.
+async fn send_draft_summary(
+    bot: &Bot,
+    db: &Db,
+    drafts: &DraftStore,
+    chat_id: ChatId,
+    draft: SpendingDraft,
+) -> HandlerResult {
+    let d = build_draft_display(&draft, db);
+    // Send first: the draft is keyed by the summary message's id.
+    let sent = bot
+        .send_message(chat_id, &d.summary_text)
+        .parse_mode(ParseMode::Html)
+        .reply_markup(summary_markup(&d, &draft))
+        .await?;
+    drafts.set(draft_key(sent.chat.id, sent.id), draft);
+    Ok(())
+}
+
 pub async fn handle_message(
     bot: Bot,
     msg: Message,
@@ -178,7 +250,7 @@ pub async fn handle_message(
     drafts: Arc<DraftStore>,
 ) -> HandlerResult {
     let text = match msg.text() {
-        Some(t) => t.trim().to_string(),
+        Some(t) => t.trim(),
         None => return Ok(()),
     };
 
@@ -193,7 +265,7 @@ pub async fn handle_message(
         }
     };
 
-    if let Some(cmd) = parse_command(&text) {
+    if let Some(cmd) = parse_command(text) {
         match cmd {
             Command::Start => {
                 bot.send_message(
@@ -217,7 +289,7 @@ pub async fn handle_message(
                             .unwrap_or("?");
                         format!("Текущий счёт по умолчанию: {}\n\nВыберите новый:", current)
                     }
-                    None => "Счёт по умолчанию не выбран.\n\nВыберите счёт:".to_string(),
+                    None => NO_DEFAULT_ACCOUNT_PROMPT.to_string(),
                 };
                 bot.send_message(msg.chat.id, prompt)
                     .reply_markup(keyboards::default_account_keyboard(
@@ -245,7 +317,7 @@ pub async fn handle_message(
                     .into_iter()
                     .map(|(ym, is_current)| (format_month_label(&ym, is_current), ym))
                     .collect();
-                bot.send_message(msg.chat.id, "📤 Выберите месяц для экспорта:")
+                bot.send_message(msg.chat.id, EXPORT_PROMPT)
                     .reply_markup(keyboards::export_months_keyboard(&labeled))
                     .await?;
                 return Ok(());
@@ -271,31 +343,30 @@ pub async fn handle_message(
         }
     }
 
-    let amount_key = drafts.find_by_state(telegram_id, EditState::EnteringAmount);
-    let note_key = drafts.find_by_state(telegram_id, EditState::EnteringNote);
-    let action = classify_input(&text, amount_key, note_key);
+    let (amount_key, note_key) = drafts.find_pending_input(telegram_id);
+    let action = classify_input(text, amount_key, note_key);
 
     match action {
         MessageAction::AmountInput(key, new_amount) => {
-            drafts.update_amount(key, new_amount);
-            let updated = drafts.get(key).unwrap();
-            let (chat_id, msg_id) = (ChatId(key.0), MessageId(key.1));
-            rerender_draft_summary(&bot, &db, chat_id, msg_id, &updated).await?;
+            if let Some(updated) = drafts.update_amount(key, new_amount) {
+                let (chat_id, msg_id) = (ChatId(key.0), MessageId(key.1));
+                rerender_draft_summary(&bot, &db, chat_id, msg_id, &updated).await?;
+            }
             return Ok(());
         }
         MessageAction::NoteInput(key) => {
-            drafts.update_note(key, text);
-            let updated = drafts.get(key).unwrap();
-            let (chat_id, msg_id) = (ChatId(key.0), MessageId(key.1));
-            rerender_draft_summary(&bot, &db, chat_id, msg_id, &updated).await?;
+            if let Some(updated) = drafts.update_note(key, text.to_string()) {
+                let (chat_id, msg_id) = (ChatId(key.0), MessageId(key.1));
+                rerender_draft_summary(&bot, &db, chat_id, msg_id, &updated).await?;
+            }
+            return Ok(());
+        }
+        MessageAction::UnknownCommand => {
+            bot.send_message(msg.chat.id, UNKNOWN_COMMAND_TEXT).await?;
             return Ok(());
         }
         MessageAction::ShowHelp => {
-            bot.send_message(
-                msg.chat.id,
-                "Отправьте сумму (число), чтобы начать запись расхода.",
-            )
-            .await?;
+            bot.send_message(msg.chat.id, HELP_TEXT).await?;
             return Ok(());
         }
         MessageAction::NewAmount(_) => {
@@ -311,8 +382,9 @@ pub async fn handle_message(
     // Create new draft with defaults
     let default_account_id = user
         .default_account_id
-        .unwrap_or_else(|| db.get_all_accounts().first().map(|a| a.id).unwrap_or(1));
-    let default_category_id = db.get_all_categories().first().map(|c| c.id).unwrap_or(1);
+        .or_else(|| db.first_account_id())
+        .unwrap_or(1);
+    let default_category_id = db.first_category_id().unwrap_or(1);
 
     let draft = SpendingDraft {
         amount,
@@ -325,23 +397,7 @@ pub async fn handle_message(
         mode: DraftMode::New,
     };
 
-    let d = build_draft_display(&draft, &db);
-    // Send summary message first, then store draft keyed by that message
-    let sent = bot
-        .send_message(msg.chat.id, &d.summary_text)
-        .parse_mode(ParseMode::Html)
-        .reply_markup(keyboards::summary_keyboard(
-            &d.amount_label,
-            &d.category_label,
-            &d.account_label,
-            draft.notes.as_deref(),
-            false,
-        ))
-        .await?;
-
-    drafts.set(draft_key(sent.chat.id, sent.id), draft);
-
-    Ok(())
+    send_draft_summary(&bot, &db, &drafts, msg.chat.id, draft).await
 }
 
 pub async fn handle_callback(
@@ -350,7 +406,7 @@ pub async fn handle_callback(
     db: Arc<Db>,
     drafts: Arc<DraftStore>,
 ) -> HandlerResult {
-    bot.answer_callback_query(q.id.clone()).await?;
+    bot.answer_callback_query(q.id).await?;
 
     let data = match q.data.as_deref() {
         Some(d) => d,
@@ -372,13 +428,11 @@ pub async fn handle_callback(
     let action = classify_callback(data);
 
     if let CallbackAction::SetDefaultAccount(acc_id) = action {
-        db.update_user_default_account(user.id, acc_id)?;
-        let name = db
-            .get_account_by_id(acc_id)
-            .map(|a| a.name)
-            .unwrap_or_else(|| "?".to_string());
-        bot.edit_message_text(chat_id, msg_id, format!("✅ Счёт по умолчанию: {}", name))
-            .await?;
+        let text = match db.update_user_default_account(user.id, acc_id)? {
+            Some(name) => format!("✅ Счёт по умолчанию: {}", name),
+            None => ACCOUNT_NOT_FOUND_TEXT.to_string(),
+        };
+        bot.edit_message_text(chat_id, msg_id, text).await?;
         return Ok(());
     }
 
@@ -406,7 +460,7 @@ pub async fn handle_callback(
         let spending = match db.get_spending_by_id(spending_id) {
             Some(s) => s,
             None => {
-                bot.send_message(chat_id, "Транзакция не найдена.").await?;
+                bot.send_message(chat_id, SPENDING_NOT_FOUND_TEXT).await?;
                 return Ok(());
             }
         };
@@ -420,26 +474,13 @@ pub async fn handle_callback(
             edit_state: EditState::Summary,
             mode: DraftMode::Editing(spending.id),
         };
-        let d = build_draft_display(&draft, &db);
-        let sent = bot
-            .send_message(chat_id, &d.summary_text)
-            .parse_mode(ParseMode::Html)
-            .reply_markup(keyboards::summary_keyboard(
-                &d.amount_label,
-                &d.category_label,
-                &d.account_label,
-                draft.notes.as_deref(),
-                true,
-            ))
-            .await?;
-        drafts.set(draft_key(sent.chat.id, sent.id), draft);
-        return Ok(());
+        return send_draft_summary(&bot, &db, &drafts, chat_id, draft).await;
     }
 
     let key = draft_key(chat_id, msg_id);
 
-    if drafts.get(key).is_none() {
-        bot.edit_message_text(chat_id, msg_id, "Нет активного черновика. Отправьте сумму.")
+    if !drafts.contains(key) {
+        bot.edit_message_text(chat_id, msg_id, NO_DRAFT_TEXT)
             .await?;
         return Ok(());
     }
@@ -447,13 +488,13 @@ pub async fn handle_callback(
     match action {
         CallbackAction::EditAmount => {
             drafts.update_state(key, EditState::EnteringAmount);
-            bot.edit_message_text(chat_id, msg_id, "Введите новую сумму:")
+            bot.edit_message_text(chat_id, msg_id, ENTER_AMOUNT_PROMPT)
                 .await?;
         }
         CallbackAction::EditCategory => {
             drafts.update_state(key, EditState::ChoosingCategory);
             let categories = db.get_all_categories();
-            bot.edit_message_text(chat_id, msg_id, "Выберите категорию:")
+            bot.edit_message_text(chat_id, msg_id, CHOOSE_CATEGORY_PROMPT)
                 .reply_markup(keyboards::category_keyboard(&categories))
                 .await?;
         }
@@ -461,48 +502,54 @@ pub async fn handle_callback(
             drafts.update_state(key, EditState::ChoosingAccount);
             let accounts = db.get_all_accounts();
             let users = db.get_all_users();
-            bot.edit_message_text(chat_id, msg_id, "Выберите счёт:")
+            bot.edit_message_text(chat_id, msg_id, CHOOSE_ACCOUNT_PROMPT)
                 .reply_markup(keyboards::account_keyboard(&accounts, &users))
                 .await?;
         }
         CallbackAction::EditNote => {
             drafts.update_state(key, EditState::EnteringNote);
-            bot.edit_message_text(chat_id, msg_id, "Введите заметку:")
+            bot.edit_message_text(chat_id, msg_id, ENTER_NOTE_PROMPT)
                 .await?;
         }
         CallbackAction::Save => {
-            let draft = drafts.remove(key).unwrap();
-            let (header, spending_id) = match draft.mode {
+            let Some(draft) = drafts.remove(key) else {
+                bot.edit_message_text(chat_id, msg_id, NO_DRAFT_TEXT)
+                    .await?;
+                return Ok(());
+            };
+            let (header, saved) = match draft.mode {
                 DraftMode::Editing(id) => {
-                    db.update_spending(
+                    let updated = db.update_spending(
                         id,
                         draft.account_id,
                         draft.amount,
                         draft.category_id,
                         draft.notes.as_deref(),
                     )?;
-                    ("✅ Изменено!", id)
+                    // The row may have been deleted since the draft was opened.
+                    let Some(saved) = updated else {
+                        bot.edit_message_text(chat_id, msg_id, SPENDING_NOT_FOUND_TEXT)
+                            .await?;
+                        return Ok(());
+                    };
+                    (UPDATED_HEADER, saved)
                 }
                 DraftMode::New => {
-                    let new_id = db.insert_spending(
+                    let saved = db.insert_spending(
                         draft.account_id,
                         draft.amount,
                         draft.category_id,
                         draft.reporter_user_id,
                         draft.notes.as_deref(),
                     )?;
-                    ("✅ Сохранено!", new_id)
+                    (SAVED_HEADER, saved)
                 }
             };
 
             let d = build_draft_display(&draft, &db);
-            let created_at = db
-                .get_spending_by_id(spending_id)
-                .map(|s| s.created_at)
-                .unwrap_or_else(|| "—".to_string());
             let mut text = format!(
                 "{}\n\nСумма: {}\n{}\n{}\nДата: {}",
-                header, d.amount_label, d.category_label, d.account_label, created_at,
+                header, d.amount_label, d.category_label, d.account_label, saved.created_at,
             );
             if let Some(notes) = &draft.notes {
                 text.push_str(&format!("\nЗаметка: {}", notes));
@@ -512,38 +559,45 @@ pub async fn handle_callback(
         }
         CallbackAction::Cancel => {
             drafts.remove(key);
-            bot.edit_message_text(chat_id, msg_id, "❌ Расход отменён.")
+            bot.edit_message_text(chat_id, msg_id, CANCELLED_TEXT)
                 .await?;
         }
         CallbackAction::SelectCategory(cat_id) => {
-            drafts.update_category(key, cat_id);
-            let updated = drafts.get(key).unwrap();
-            rerender_draft_summary(&bot, &db, chat_id, msg_id, &updated).await?;
+            if let Some(updated) = drafts.update_category(key, cat_id) {
+                rerender_draft_summary(&bot, &db, chat_id, msg_id, &updated).await?;
+            }
         }
         CallbackAction::SelectAccount(acc_id) => {
-            drafts.update_account(key, acc_id);
-            let updated = drafts.get(key).unwrap();
-            rerender_draft_summary(&bot, &db, chat_id, msg_id, &updated).await?;
+            if let Some(updated) = drafts.update_account(key, acc_id) {
+                rerender_draft_summary(&bot, &db, chat_id, msg_id, &updated).await?;
+            }
         }
         CallbackAction::Delete => {
             drafts.update_state(key, EditState::ConfirmingDelete);
-            bot.edit_message_text(chat_id, msg_id, "🗑 Удалить эту транзакцию?")
+            bot.edit_message_text(chat_id, msg_id, CONFIRM_DELETE_PROMPT)
                 .reply_markup(keyboards::confirm_delete_keyboard())
                 .await?;
         }
         CallbackAction::ConfirmDelete => {
             // Delete is only offered from Editing mode (summary_keyboard gates
             // the button on `editing`), so a New-mode draft here would be a bug.
-            let draft = drafts.remove(key).unwrap();
+            let Some(draft) = drafts.remove(key) else {
+                bot.edit_message_text(chat_id, msg_id, NO_DRAFT_TEXT)
+                    .await?;
+                return Ok(());
+            };
             if let DraftMode::Editing(id) = draft.mode {
                 db.delete_spending(id)?;
-                bot.edit_message_text(chat_id, msg_id, "🗑 Транзакция удалена.")
-                    .await?;
+                bot.edit_message_text(chat_id, msg_id, DELETED_TEXT).await?;
             }
         }
         CallbackAction::CancelDelete => {
             drafts.update_state(key, EditState::Summary);
-            let updated = drafts.get(key).unwrap();
+            let Some(updated) = drafts.get(key) else {
+                bot.edit_message_text(chat_id, msg_id, NO_DRAFT_TEXT)
+                    .await?;
+                return Ok(());
+            };
             rerender_draft_summary(&bot, &db, chat_id, msg_id, &updated).await?;
         }
         CallbackAction::SetDefaultAccount(_) => unreachable!(),
@@ -559,6 +613,26 @@ pub async fn handle_callback(
 mod tests {
     use super::*;
 
+    // --- parse_amount ---
+
+    #[test]
+    fn test_parse_amount_dot_and_comma() {
+        assert_eq!(parse_amount("7"), Some(7.0));
+        assert_eq!(parse_amount("7.25"), Some(7.25));
+        assert_eq!(parse_amount("7,25"), Some(7.25));
+    }
+
+    #[test]
+    fn test_parse_amount_rejects_non_numbers() {
+        assert_eq!(parse_amount("7,2,5"), None);
+        assert_eq!(parse_amount("seven"), None);
+        assert_eq!(parse_amount(""), None);
+        assert_eq!(parse_amount(&"1".repeat(MAX_AMOUNT_LEN + 1)), None);
+        assert_eq!(parse_amount("inf"), None);
+        assert_eq!(parse_amount("NaN"), None);
+        assert_eq!(parse_amount("1e999"), None);
+    }
+
     // --- classify_input ---
 
     #[test]
@@ -609,6 +683,19 @@ mod tests {
         );
     }
 
+    #[test]
+    fn test_unknown_command_is_not_note_or_help() {
+        let key: DraftKey = (100, 1);
+        assert_eq!(
+            classify_input("/wat", None, Some(key)),
+            MessageAction::UnknownCommand
+        );
+        assert_eq!(
+            classify_input("/wat", None, None),
+            MessageAction::UnknownCommand
+        );
+    }
+
     #[test]
     fn test_number_with_amount_entry_is_amount_input() {
         let key: DraftKey = (100, 1);
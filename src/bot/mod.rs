@@ -5,15 +5,36 @@ mod handlers;
 mod keyboards;
 
 use std::sync::Arc;
+use std::time::Duration;
 
+use teloxide::error_handlers::LoggingErrorHandler;
 use teloxide::prelude::*;
 use teloxide::types::BotCommand;
+use teloxide::update_listeners::Polling;
 
 use crate::dal::Db;
 use crate::domain::DraftStore;
 
-pub async fn run(db: Db, drafts: DraftStore) {
-    let bot = Bot::from_env();
+/// Long-poll window for `getUpdates`: an idle bot makes one request per
+/// window instead of spinning on short polls, reusing the same pooled TLS
+/// connection each time.
+const POLL_TIMEOUT: Duration = Duration::from_secs(25);
+
+/// HTTP request timeout. teloxide's default (17 s) would cut idle long polls
+/// off as network errors, so it is sized from `POLL_TIMEOUT` plus slack.
+const HTTP_TIMEOUT: Duration = Duration::from_secs(POLL_TIMEOUT.as_secs() + 10);
+
+/// Builds the bot from `TELOXIDE_TOKEN` on teloxide's default HTTP client
+/// settings (connection pooling, connect timeout), with `HTTP_TIMEOUT`.
+pub fn bot_from_env() -> Bot {
+    let client = teloxide::net::default_reqwest_settings()
+        .timeout(HTTP_TIMEOUT)
+        .build()
+        .expect("Failed to build HTTP client");
+    Bot::from_env_with_client(client)
+}
+
+pub async fn run(bot: Bot, db: Db, drafts: DraftStore) {
     let db = Arc::new(db);
     let drafts = Arc::new(drafts);
 
@@ -36,10 +57,21 @@ pub async fn run(db: Db, drafts: DraftStore) {
         .branch(Update::filter_message().endpoint(handlers::handle_message))
         .branch(Update::filter_callback_query().endpoint(handlers::handle_callback));
 
+    // allowed_updates is left unset: the dispatcher hints it from the handler
+    // tree (messages and callback queries only).
+    let listener = Polling::builder(bot.clone())
+        .timeout(POLL_TIMEOUT)
+        .delete_webhook()
+        .await
+        .build();
+
     Dispatcher::builder(bot, handler)
         .dependencies(dptree::deps![db, drafts])
         .enable_ctrlc_handler()
         .build()
-        .dispatch()
+        .dispatch_with_listener(
+            listener,
+            LoggingErrorHandler::with_custom_text("An error from the update listener"),
+        )
         .await;
 }
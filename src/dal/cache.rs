@@ -0,0 +1,88 @@
+use std::sync::{Arc, Mutex};
+use std::time::{Duration, Instant};
+
+/// Shared in-process copy of a small, read-mostly table (categories,
+/// accounts, users, ...), reloaded once it is older than `ttl`.
+///
+/// Expiry is time-based rather than write-driven because the prod DB is also
+/// edited by hand with `sqlite3`, which the bot never sees.
+pub(super) struct Snapshot<T> {
+    ttl: Duration,
+    slot: Mutex<Option<(Instant, Arc<[T]>)>>,
+}
+
+impl<T> Snapshot<T> {
+    pub(super) fn new(ttl: Duration) -> Self {
+        Self {
+            ttl,
+            slot: Mutex::new(None),
+        }
+    }
+
+    /// Returns the cached rows, calling `load` when the snapshot is missing or
+    /// stale. An empty result is returned but not cached: it is either a failed
+    /// query (already logged by the loader) or a not-yet-populated table, and
+    /// neither should stick for a whole TTL.
+    pub(super) fn get_or_load(&self, load: impl FnOnce() -> Vec<T>) -> Arc<[T]> {
+        let mut slot = self.slot.lock().unwrap();
+        if let Some((loaded_at, rows)) = slot.as_ref() {
+            if loaded_at.elapsed() < self.ttl {
+                return Arc::clone(rows);
+            }
+        }
+        let rows: Arc<[T]> = load().into();
+        *slot = if rows.is_empty() {
+            None
+        } else {
+            Some((Instant::now(), Arc::clone(&rows)))
+        };
+        rows
+    }
+
+    /// Drops the cached rows so the next read goes to the database. Used after
+    /// the bot's own writes, which should show up immediately.
+    pub(super) fn invalidate(&self) {
+        *self.slot.lock().unwrap() = None;
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::cell::Cell;
+
+    #[test]
+    fn test_snapshot_loads_once_within_ttl() {
+        let snap = Snapshot::new(Duration::from_secs(60));
+        let loads = Cell::new(0);
+        let load = || {
+            loads.set(loads.get() + 1);
+            vec![1, 2, 3]
+        };
+        assert_eq!(&*snap.get_or_load(load), &[1, 2, 3]);
+        assert_eq!(&*snap.get_or_load(load), &[1, 2, 3]);
+        assert_eq!(loads.get(), 1);
+    }
+
+    #[test]
+    fn test_snapshot_reloads_when_stale() {
+        let snap = Snapshot::new(Duration::ZERO);
+        snap.get_or_load(|| vec![1]);
+        assert_eq!(&*snap.get_or_load(|| vec![2]), &[2]);
+    }
+
+    #[test]
+    fn test_snapshot_invalidate_forces_reload() {
+        let snap = Snapshot::new(Duration::from_secs(60));
+        snap.get_or_load(|| vec![1]);
+        snap.invalidate();
+        assert_eq!(&*snap.get_or_load(|| vec![2]), &[2]);
+    }
+
+    #[test]
+    fn test_snapshot_does_not_cache_empty() {
+        let snap = Snapshot::new(Duration::from_secs(60));
+        assert!(snap.get_or_load(Vec::new).is_empty());
+        assert_eq!(&*snap.get_or_load(|| vec![7]), &[7]);
+    }
+}
@@ -1,3 +1,4 @@
+mod cache;
 mod models;
 mod queries;
 #[cfg(test)]
@@ -5,13 +6,23 @@ mod seed;
 
 pub use models::*;
 
+use cache::Snapshot;
 use models::{
     row_to_account, row_to_category, row_to_currency, row_to_recent_spending, row_to_spending,
-    row_to_user, ACCOUNT_COLS, CATEGORY_COLS, CURRENCY_COLS, RECENT_SPENDING_SELECT, SPENDING_COLS,
-    USER_COLS,
+    row_to_user,
 };
-use rusqlite::Connection;
+use rusqlite::{Connection, OptionalExtension, TransactionBehavior};
 use std::sync::{Arc, Mutex};
+use std::time::Duration;
+
+/// How long lookup-table snapshots (categories, accounts, users, currencies)
+/// are served before being re-read. Keyboards and draft summaries hit these
+/// on every tap.
+const LOOKUP_TTL: Duration = Duration::from_secs(30);
+
+/// How long a statement waits on a lock held by another process (a manual
+/// `sqlite3` session, the cron scripts) before failing with `SQLITE_BUSY`.
+const BUSY_TIMEOUT: Duration = Duration::from_secs(5);
 
 /// Map a rusqlite Result to Option, logging unexpected errors at warn level.
 /// `QueryReturnedNoRows` is the legitimate "not found" case and is silent so
@@ -27,26 +38,38 @@ fn ok_or_log<T>(op: &str, r: rusqlite::Result<T>) -> Option<T> {
     }
 }
 
+/// Connection settings applied on every open. `journal_mode` is persisted in
+/// the file, but `synchronous` and `foreign_keys` are per-connection and
+/// would otherwise fall back to SQLite's defaults (FULL, OFF) after a restart.
+/// WAL also lets the cron `sqlite3` readers (backup, log checks) run
+/// alongside the bot's writes.
+fn configure(conn: &Connection) -> Result<(), rusqlite::Error> {
+    conn.pragma_update_and_check(None, "journal_mode", "WAL", |_| Ok(()))?;
+    conn.pragma_update(None, "synchronous", "NORMAL")?;
+    conn.pragma_update(None, "foreign_keys", true)?;
+    conn.busy_timeout(BUSY_TIMEOUT)?;
+    Ok(())
+}
+
+#[derive(Clone)]
 pub struct Db {
     conn: Arc<Mutex<Connection>>,
+    categories: Arc<Snapshot<Category>>,
+    accounts: Arc<Snapshot<Account>>,
+    users: Arc<Snapshot<User>>,
+    currencies: Arc<Snapshot<Currency>>,
 }
 
 impl Db {
     pub fn open(path: &str) -> Result<Self, rusqlite::Error> {
-        let conn = Connection::open(path)?;
-        let db = Self {
-            conn: Arc::new(Mutex::new(conn)),
-        };
+        let db = Self::from_connection(Connection::open(path)?)?;
         db.run_migrations();
         Ok(db)
     }
 
     #[cfg(test)]
     pub fn open_in_memory() -> Result<Self, rusqlite::Error> {
-        let conn = Connection::open_in_memory()?;
-        let db = Self {
-            conn: Arc::new(Mutex::new(conn)),
-        };
+        let db = Self::from_connection(Connection::open_in_memory()?)?;
         db.run_migrations();
         {
             let c = db.conn.lock().unwrap();
@@ -55,134 +78,163 @@ impl Db {
         Ok(db)
     }
 
+    fn from_connection(conn: Connection) -> Result<Self, rusqlite::Error> {
+        configure(&conn)?;
+        Ok(Self {
+            conn: Arc::new(Mutex::new(conn)),
+            categories: Arc::new(Snapshot::new(LOOKUP_TTL)),
+            accounts: Arc::new(Snapshot::new(LOOKUP_TTL)),
+            users: Arc::new(Snapshot::new(LOOKUP_TTL)),
+            currencies: Arc::new(Snapshot::new(LOOKUP_TTL)),
+        })
+    }
+
     fn run_migrations(&self) {
-        let conn = self.conn.lock().unwrap();
+        let mut conn = self.conn.lock().unwrap();
         let version: i64 = conn
             .query_row("SELECT version FROM schema_version LIMIT 1", [], |row| {
                 row.get(0)
             })
             .unwrap_or(0);
 
-        if version < 1 {
-            conn.execute_batch(queries::SCHEMA_V1).unwrap();
-            conn.execute(
+        for (i, sql) in queries::MIGRATIONS.iter().enumerate() {
+            let target = i as i64 + 1;
+            if version >= target {
+                continue;
+            }
+            // A step and its version bump commit together, so a failure midway
+            // can't leave the schema changed but the recorded version behind.
+            // IMMEDIATE takes the write lock up front rather than upgrading
+            // mid-step, which a concurrent `sqlite3` session could refuse.
+            let tx = conn
+                .transaction_with_behavior(TransactionBehavior::Immediate)
+                .unwrap();
+            tx.execute_batch(sql).unwrap();
+            tx.execute(
                 "INSERT OR REPLACE INTO schema_version (rowid, version) VALUES (1, ?1)",
-                [1i64],
+                [target],
             )
             .unwrap();
-            log::info!("Migrated to schema version 1");
+            tx.commit().unwrap();
+            log::info!("Migrated to schema version {}", target);
         }
     }
 
+    /// Whitelist lookup, run on every update. Served from the users snapshot,
+    /// so a user added or removed by hand takes effect within `LOOKUP_TTL`.
     pub fn get_user_by_telegram_id(&self, telegram_id: i64) -> Option<User> {
-        let conn = self.conn.lock().unwrap();
-        ok_or_log(
-            "get_user_by_telegram_id",
-            conn.query_row(
-                &format!("SELECT {USER_COLS} FROM users WHERE telegram_id = ?1"),
-                [telegram_id],
-                row_to_user,
-            ),
-        )
-    }
-
-    pub fn get_all_users(&self) -> Vec<User> {
-        let conn = self.conn.lock().unwrap();
-        let mut stmt = conn
-            .prepare(&format!("SELECT {USER_COLS} FROM users"))
-            .unwrap();
-        stmt.query_map([], row_to_user)
-            .unwrap()
-            .filter_map(|r| ok_or_log("get_all_users row", r))
-            .collect()
-    }
-
+        self.get_all_users()
+            .iter()
+            .find(|u| u.telegram_id == telegram_id)
+            .cloned()
+    }
+
+    /// Served from a snapshot that is at most `LOOKUP_TTL` old.
+    pub fn get_all_users(&self) -> Arc<[User]> {
+        self.users.get_or_load(|| {
+            let conn = self.conn.lock().unwrap();
+            let mut stmt = conn.prepare_cached(queries::SELECT_USERS).unwrap();
+            stmt.query_map([], row_to_user)
+                .unwrap()
+                .filter_map(|r| ok_or_log("get_all_users row", r))
+                .collect()
+        })
+    }
+
+    /// Sets the user's default account and returns the account's name, in one
+    /// statement. Returns `None` (and changes nothing) if either the user or
+    /// the account does not exist.
     pub fn update_user_default_account(
         &self,
         user_id: i64,
         account_id: i64,
-    ) -> Result<(), rusqlite::Error> {
-        let conn = self.conn.lock().unwrap();
-        conn.execute(
-            "UPDATE users SET default_account_id = ?1 WHERE id = ?2",
-            rusqlite::params![account_id, user_id],
-        )?;
-        Ok(())
+    ) -> Result<Option<String>, rusqlite::Error> {
+        let name = {
+            let conn = self.conn.lock().unwrap();
+            conn.prepare_cached(
+                "UPDATE users SET default_account_id = ?1 \
+                 WHERE id = ?2 AND EXISTS (SELECT 1 FROM accounts WHERE id = ?1) \
+                 RETURNING (SELECT name FROM accounts WHERE id = ?1)",
+            )
+            .and_then(|mut stmt| {
+                stmt.query_row(rusqlite::params![account_id, user_id], |row| row.get(0))
+            })
+            .optional()?
+        };
+        // Invalidate after releasing `conn`: snapshot loads lock the slot and
+        // then `conn`, so taking them in the other order could deadlock.
+        if name.is_some() {
+            self.users.invalidate();
+        }
+        Ok(name)
     }
 
-    pub fn get_all_accounts(&self) -> Vec<Account> {
-        let conn = self.conn.lock().unwrap();
-        let mut stmt = conn
-            .prepare(&format!("SELECT {ACCOUNT_COLS} FROM accounts"))
-            .unwrap();
-        stmt.query_map([], row_to_account)
-            .unwrap()
-            .filter_map(|r| ok_or_log("get_all_accounts row", r))
-            .collect()
+    /// Served from a snapshot that is at most `LOOKUP_TTL` old.
+    pub fn get_all_accounts(&self) -> Arc<[Account]> {
+        self.accounts.get_or_load(|| {
+            let conn = self.conn.lock().unwrap();
+            let mut stmt = conn.prepare_cached(queries::SELECT_ACCOUNTS).unwrap();
+            stmt.query_map([], row_to_account)
+                .unwrap()
+                .filter_map(|r| ok_or_log("get_all_accounts row", r))
+                .collect()
+        })
     }
 
     pub fn get_account_by_id(&self, id: i64) -> Option<Account> {
-        let conn = self.conn.lock().unwrap();
-        ok_or_log(
-            "get_account_by_id",
-            conn.query_row(
-                &format!("SELECT {ACCOUNT_COLS} FROM accounts WHERE id = ?1"),
-                [id],
-                row_to_account,
-            ),
-        )
+        self.get_all_accounts().iter().find(|a| a.id == id).cloned()
     }
 
-    pub fn get_all_categories(&self) -> Vec<Category> {
-        let conn = self.conn.lock().unwrap();
-        let mut stmt = conn
-            .prepare(&format!(
-                "SELECT {CATEGORY_COLS} FROM categories ORDER BY sort_order"
-            ))
-            .unwrap();
-        stmt.query_map([], row_to_category)
-            .unwrap()
-            .filter_map(|r| ok_or_log("get_all_categories row", r))
-            .collect()
+    /// Fallback account for new drafts when the user has no default set.
+    pub fn first_account_id(&self) -> Option<i64> {
+        self.get_all_accounts().first().map(|a| a.id)
+    }
+
+    /// Served from a snapshot that is at most `LOOKUP_TTL` old.
+    pub fn get_all_categories(&self) -> Arc<[Category]> {
+        self.categories.get_or_load(|| {
+            let conn = self.conn.lock().unwrap();
+            let mut stmt = conn.prepare_cached(queries::SELECT_CATEGORIES).unwrap();
+            stmt.query_map([], row_to_category)
+                .unwrap()
+                .filter_map(|r| ok_or_log("get_all_categories row", r))
+                .collect()
+        })
     }
 
     pub fn get_category_by_id(&self, id: i64) -> Option<Category> {
-        let conn = self.conn.lock().unwrap();
-        ok_or_log(
-            "get_category_by_id",
-            conn.query_row(
-                &format!("SELECT {CATEGORY_COLS} FROM categories WHERE id = ?1"),
-                [id],
-                row_to_category,
-            ),
-        )
+        self.get_all_categories()
+            .iter()
+            .find(|c| c.id == id)
+            .cloned()
     }
 
-    pub fn get_all_currencies(&self) -> Vec<Currency> {
-        let conn = self.conn.lock().unwrap();
-        let mut stmt = conn
-            .prepare(&format!(
-                "SELECT {CURRENCY_COLS} FROM currencies ORDER BY id"
-            ))
-            .unwrap();
-        stmt.query_map([], row_to_currency)
-            .unwrap()
-            .filter_map(|r| ok_or_log("get_all_currencies row", r))
-            .collect()
+    /// Category preselected on new drafts: the first one in sort order.
+    pub fn first_category_id(&self) -> Option<i64> {
+        self.get_all_categories().first().map(|c| c.id)
+    }
+
+    /// Served from a snapshot that is at most `LOOKUP_TTL` old.
+    pub fn get_all_currencies(&self) -> Arc<[Currency]> {
+        self.currencies.get_or_load(|| {
+            let conn = self.conn.lock().unwrap();
+            let mut stmt = conn.prepare_cached(queries::SELECT_CURRENCIES).unwrap();
+            stmt.query_map([], row_to_currency)
+                .unwrap()
+                .filter_map(|r| ok_or_log("get_all_currencies row", r))
+                .collect()
+        })
     }
 
     pub fn get_currency_by_id(&self, id: i64) -> Option<Currency> {
-        let conn = self.conn.lock().unwrap();
-        ok_or_log(
-            "get_currency_by_id",
-            conn.query_row(
-                &format!("SELECT {CURRENCY_COLS} FROM currencies WHERE id = ?1"),
-                [id],
-                row_to_currency,
-            ),
-        )
+        self.get_all_currencies()
+            .iter()
+            .find(|c| c.id == id)
+            .cloned()
     }
 
+    /// Inserts a spending and returns the stored row, including the
+    /// DB-assigned `id` and `created_at`.
     pub fn insert_spending(
         &self,
         account_id: i64,
@@ -190,27 +242,27 @@ impl Db {
         category_id: i64,
         reporter_id: i64,
         notes: Option<&str>,
-    ) -> Result<i64, rusqlite::Error> {
+    ) -> Result<Spending, rusqlite::Error> {
         let conn = self.conn.lock().unwrap();
-        conn.execute(
-            "INSERT INTO spendings (account_id, amount, category_id, reporter_id, notes) VALUES (?1, ?2, ?3, ?4, ?5)",
-            rusqlite::params![account_id, amount, category_id, reporter_id, notes],
-        )?;
-        Ok(conn.last_insert_rowid())
+        conn.prepare_cached(queries::INSERT_SPENDING)
+            .and_then(|mut stmt| {
+                stmt.query_row(
+                    rusqlite::params![account_id, amount, category_id, reporter_id, notes],
+                    row_to_spending,
+                )
+            })
     }
 
     pub fn get_spending_by_id(&self, id: i64) -> Option<Spending> {
         let conn = self.conn.lock().unwrap();
         ok_or_log(
             "get_spending_by_id",
-            conn.query_row(
-                &format!("SELECT {SPENDING_COLS} FROM spendings WHERE id = ?1"),
-                [id],
-                row_to_spending,
-            ),
+            conn.prepare_cached(queries::SELECT_SPENDING_BY_ID)
+                .and_then(|mut stmt| stmt.query_row([id], row_to_spending)),
         )
     }
 
+    /// Returns the updated row, or `None` if no spending has this `id`.
     pub fn update_spending(
         &self,
         id: i64,
@@ -218,18 +270,22 @@ impl Db {
         amount: f64,
         category_id: i64,
         notes: Option<&str>,
-    ) -> Result<(), rusqlite::Error> {
+    ) -> Result<Option<Spending>, rusqlite::Error> {
         let conn = self.conn.lock().unwrap();
-        conn.execute(
-            "UPDATE spendings SET account_id = ?1, amount = ?2, category_id = ?3, notes = ?4 WHERE id = ?5",
-            rusqlite::params![account_id, amount, category_id, notes, id],
-        )?;
-        Ok(())
+        conn.prepare_cached(queries::UPDATE_SPENDING)
+            .and_then(|mut stmt| {
+                stmt.query_row(
+                    rusqlite::params![account_id, amount, category_id, notes, id],
+                    row_to_spending,
+                )
+            })
+            .optional()
     }
 
     pub fn delete_spending(&self, id: i64) -> Result<(), rusqlite::Error> {
         let conn = self.conn.lock().unwrap();
-        conn.execute("DELETE FROM spendings WHERE id = ?1", [id])?;
+        conn.prepare_cached("DELETE FROM spendings WHERE id = ?1")?
+            .execute([id])?;
         Ok(())
     }
 
@@ -237,23 +293,20 @@ impl Db {
     /// and timezone of stored `created_at`).
     pub fn current_year_month(&self) -> String {
         let conn = self.conn.lock().unwrap();
-        let r = conn.query_row("SELECT strftime('%Y-%m', 'now', 'localtime')", [], |r| {
-            r.get(0)
-        });
+        let r = conn
+            .prepare_cached("SELECT strftime('%Y-%m', 'now', 'localtime')")
+            .and_then(|mut stmt| stmt.query_row([], |r| r.get(0)));
         ok_or_log("current_year_month", r).unwrap_or_else(|| "1970-01".to_string())
     }
 
     /// All spendings whose local-time `created_at` is in `year_month`
     /// (e.g. "2026-05"), ordered chronologically (oldest first). Joined with
-    /// account/currency/category/user.
+    /// account/currency/category/user. See `queries::SELECT_SPENDINGS_IN_MONTH`
+    /// for how the month becomes an index range.
     pub fn get_spendings_in_month(&self, year_month: &str) -> Vec<RecentSpending> {
         let conn = self.conn.lock().unwrap();
         let mut stmt = conn
-            .prepare(&format!(
-                "{RECENT_SPENDING_SELECT} \
-                 WHERE strftime('%Y-%m', s.created_at, 'localtime') = ?1 \
-                 ORDER BY s.created_at ASC, s.id ASC"
-            ))
+            .prepare_cached(queries::SELECT_SPENDINGS_IN_MONTH)
             .unwrap();
         stmt.query_map([year_month], row_to_recent_spending)
             .unwrap()
@@ -264,9 +317,7 @@ impl Db {
     pub fn get_recent_spendings(&self, limit: i64) -> Vec<RecentSpending> {
         let conn = self.conn.lock().unwrap();
         let mut stmt = conn
-            .prepare(&format!(
-                "{RECENT_SPENDING_SELECT} ORDER BY s.id DESC LIMIT ?1"
-            ))
+            .prepare_cached(queries::SELECT_RECENT_SPENDINGS)
             .unwrap();
         stmt.query_map([limit], row_to_recent_spending)
             .unwrap()
@@ -275,14 +326,6 @@ impl Db {
     }
 }
 
-impl Clone for Db {
-    fn clone(&self) -> Self {
-        Self {
-            conn: Arc::clone(&self.conn),
-        }
-    }
-}
-
 #[cfg(test)]
 mod tests {
     use super::*;
@@ -314,6 +357,13 @@ mod tests {
         assert_eq!(cats[19].name, "Другое");
     }
 
+    #[test]
+    fn test_first_category_and_account_ids() {
+        let db = Db::open_in_memory().unwrap();
+        assert_eq!(db.first_category_id(), Some(db.get_all_categories()[0].id));
+        assert_eq!(db.first_account_id(), Some(db.get_all_accounts()[0].id));
+    }
+
     #[test]
     fn test_accounts_seeded() {
         let db = Db::open_in_memory().unwrap();
@@ -340,10 +390,44 @@ mod tests {
         let cats = db.get_all_categories();
         let accounts = db.get_all_accounts();
 
-        let id = db
+        let s = db
             .insert_spending(accounts[0].id, 15.50, cats[0].id, user.id, Some("test"))
             .unwrap();
-        assert!(id > 0);
+        assert!(s.id > 0);
+        assert_eq!(s.amount, 15.50);
+        assert_eq!(s.notes.as_deref(), Some("test"));
+        assert_eq!(s.created_at.len(), "YYYY-MM-DDTHH:MM:SS".len());
+    }
+
+    #[test]
+    fn test_update_user_default_account_returns_name() {
+        let db = Db::open_in_memory().unwrap();
+        let user = db.get_user_by_telegram_id(seed::ALICE_TELEGRAM_ID).unwrap();
+        let accounts = db.get_all_accounts();
+        db.get_all_users(); // warm the snapshot
+
+        let name = db
+            .update_user_default_account(user.id, accounts[1].id)
+            .unwrap();
+        assert_eq!(name.as_deref(), Some(accounts[1].name.as_str()));
+        let user = db.get_user_by_telegram_id(seed::ALICE_TELEGRAM_ID).unwrap();
+        assert_eq!(user.default_account_id, Some(accounts[1].id));
+        let cached = db.get_all_users();
+        let cached = cached.iter().find(|u| u.id == user.id).unwrap();
+        assert_eq!(cached.default_account_id, Some(accounts[1].id));
+    }
+
+    #[test]
+    fn test_update_user_default_account_unknown_account_is_noop() {
+        let db = Db::open_in_memory().unwrap();
+        let user = db.get_user_by_telegram_id(seed::ALICE_TELEGRAM_ID).unwrap();
+
+        assert!(db
+            .update_user_default_account(user.id, 99_999)
+            .unwrap()
+            .is_none());
+        let after = db.get_user_by_telegram_id(seed::ALICE_TELEGRAM_ID).unwrap();
+        assert_eq!(after.default_account_id, user.default_account_id);
     }
 
     #[test]
@@ -359,8 +443,8 @@ mod tests {
         let db = Db::open_in_memory().unwrap();
         let codes: Vec<String> = db
             .get_all_currencies()
-            .into_iter()
-            .map(|c| c.currency_code)
+            .iter()
+            .map(|c| c.currency_code.clone())
             .collect();
         assert_eq!(codes, vec!["EUR", "USD", "BYN"]);
     }
@@ -410,7 +494,8 @@ mod tests {
         };
         let id = db
             .insert_spending(acc_id, 1.0, cats[0].id, user.id, None)
-            .unwrap();
+            .unwrap()
+            .id;
         {
             let conn = db.conn.lock().unwrap();
             conn.execute(
@@ -435,13 +520,16 @@ mod tests {
         // Insert spendings then rewrite their created_at to known months.
         let id_a = db
             .insert_spending(accounts[0].id, 1.0, cats[0].id, user.id, Some("apr1"))
-            .unwrap();
+            .unwrap()
+            .id;
         let id_b = db
             .insert_spending(accounts[0].id, 2.0, cats[0].id, user.id, Some("may1"))
-            .unwrap();
+            .unwrap()
+            .id;
         let id_c = db
             .insert_spending(accounts[0].id, 3.0, cats[0].id, user.id, Some("may2"))
-            .unwrap();
+            .unwrap()
+            .id;
         {
             let conn = db.conn.lock().unwrap();
             conn.execute(
@@ -475,6 +563,55 @@ mod tests {
         assert!(mar.is_empty());
     }
 
+    #[test]
+    fn test_get_spendings_in_month_boundary_with_hand_entered_timestamps() {
+        let db = Db::open_in_memory().unwrap();
+        let user = db.get_user_by_telegram_id(seed::ALICE_TELEGRAM_ID).unwrap();
+        let cats = db.get_all_categories();
+        let accounts = db.get_all_accounts();
+
+        let id_before = db
+            .insert_spending(accounts[0].id, 1.0, cats[0].id, user.id, Some("before"))
+            .unwrap()
+            .id;
+        let id_at = db
+            .insert_spending(accounts[0].id, 2.0, cats[0].id, user.id, Some("at"))
+            .unwrap()
+            .id;
+        // Local midnight of May 1st converted to UTC, written the way someone
+        // would type it into `sqlite3`: with a space instead of 'T'.
+        let stored_at = {
+            let conn = db.conn.lock().unwrap();
+            conn.execute(
+                "UPDATE spendings SET created_at = \
+                 strftime('%Y-%m-%d %H:%M:%S', '2026-05-01', 'utc', '-1 second') WHERE id = ?1",
+                [id_before],
+            )
+            .unwrap();
+            conn.execute(
+                "UPDATE spendings SET created_at = \
+                 strftime('%Y-%m-%d %H:%M:%S', '2026-05-01', 'utc') WHERE id = ?1",
+                [id_at],
+            )
+            .unwrap();
+            conn.query_row(
+                "SELECT created_at FROM spendings WHERE id = ?1",
+                [id_at],
+                |r| r.get::<_, String>(0),
+            )
+            .unwrap()
+        };
+        assert_eq!(stored_at.chars().nth(10), Some('T'));
+
+        let apr = db.get_spendings_in_month("2026-04");
+        assert!(apr.iter().any(|s| s.notes.as_deref() == Some("before")));
+        assert!(apr.iter().all(|s| s.notes.as_deref() != Some("at")));
+
+        let may = db.get_spendings_in_month("2026-05");
+        assert!(may.iter().any(|s| s.notes.as_deref() == Some("at")));
+        assert!(may.iter().all(|s| s.notes.as_deref() != Some("before")));
+    }
+
     #[test]
     fn test_current_year_month_format() {
         let db = Db::open_in_memory().unwrap();
@@ -495,7 +632,8 @@ mod tests {
 
         let id = db
             .insert_spending(accounts[0].id, 7.25, cats[0].id, user.id, Some("note"))
-            .unwrap();
+            .unwrap()
+            .id;
         let s = db.get_spending_by_id(id).unwrap();
         assert_eq!(s.amount, 7.25);
         assert_eq!(s.category_id, cats[0].id);
@@ -513,16 +651,25 @@ mod tests {
 
         let id = db
             .insert_spending(accounts[0].id, 5.0, cats[0].id, user.id, Some("old"))
+            .unwrap()
+            .id;
+        let returned = db
+            .update_spending(id, accounts[1].id, 9.99, cats[1].id, None)
+            .unwrap()
             .unwrap();
-        db.update_spending(id, accounts[1].id, 9.99, cats[1].id, None)
-            .unwrap();
+        assert_eq!(returned.amount, 9.99);
         let s = db.get_spending_by_id(id).unwrap();
+        assert_eq!(returned.created_at, s.created_at);
         assert_eq!(s.amount, 9.99);
         assert_eq!(s.account_id, accounts[1].id);
         assert_eq!(s.category_id, cats[1].id);
         assert!(s.notes.is_none());
         // reporter is not changed by update
         assert_eq!(s.reporter_id, user.id);
+        assert!(db
+            .update_spending(99_999, accounts[0].id, 1.0, cats[0].id, None)
+            .unwrap()
+            .is_none());
     }
 
     #[test]
@@ -534,12 +681,49 @@ mod tests {
 
         let id = db
             .insert_spending(accounts[0].id, 5.0, cats[0].id, user.id, None)
-            .unwrap();
+            .unwrap()
+            .id;
         assert!(db.get_spending_by_id(id).is_some());
         db.delete_spending(id).unwrap();
         assert!(db.get_spending_by_id(id).is_none());
     }
 
+    #[test]
+    fn test_connection_pragmas() {
+        let db = Db::open_in_memory().unwrap();
+        let conn = db.conn.lock().unwrap();
+        let foreign_keys: bool = conn
+            .query_row("PRAGMA foreign_keys", [], |r| r.get(0))
+            .unwrap();
+        assert!(foreign_keys);
+        let synchronous: i64 = conn
+            .query_row("PRAGMA synchronous", [], |r| r.get(0))
+            .unwrap();
+        assert_eq!(synchronous, 1); // NORMAL
+        let busy_ms: i64 = conn
+            .query_row("PRAGMA busy_timeout", [], |r| r.get(0))
+            .unwrap();
+        assert_eq!(busy_ms, BUSY_TIMEOUT.as_millis() as i64);
+    }
+
+    #[test]
+    fn test_migrations_reach_latest_version() {
+        let db = Db::open_in_memory().unwrap();
+        let conn = db.conn.lock().unwrap();
+        let version: i64 = conn
+            .query_row("SELECT version FROM schema_version", [], |r| r.get(0))
+            .unwrap();
+        assert_eq!(version, queries::MIGRATIONS.len() as i64);
+        let has_index: bool = conn
+            .query_row(
+                "SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE name = 'idx_spendings_created_at')",
+                [],
+                |r| r.get(0),
+            )
+            .unwrap();
+        assert!(has_index);
+    }
+
     #[test]
     fn test_seed_idempotent() {
         let db = Db::open_in_memory().unwrap();
@@ -1,14 +1,15 @@
 use rusqlite::Row;
 
+#[derive(Clone)]
 pub struct User {
     pub id: i64,
     pub name: String,
-    #[allow(dead_code)]
     pub telegram_id: i64,
     pub is_admin: bool,
     pub default_account_id: Option<i64>,
 }
 
+#[derive(Clone)]
 pub struct Account {
     pub id: i64,
     pub name: String,
@@ -17,13 +18,13 @@ pub struct Account {
     pub iban: Option<String>,
 }
 
+#[derive(Clone)]
 pub struct Category {
     pub id: i64,
     pub name: String,
-    #[allow(dead_code)]
-    pub sort_order: i64,
 }
 
+#[derive(Clone)]
 pub struct Currency {
     pub id: i64,
     pub currency_code: String,
@@ -51,31 +52,60 @@ pub struct RecentSpending {
     pub created_at: String,
 }
 
-// SELECT-list constants and row→struct mappers. Each `*_COLS` constant must list
+// SELECT-list macros and row→struct mappers. Each `*_cols!` macro must list
 // columns in the exact order the matching `row_to_*` function reads them.
+// They are macros rather than `&str` consts so `queries` can splice them into
+// whole statements with `concat!` at compile time.
 //
-// `created_at` is stored in UTC; SPENDING_COLS / RECENT_SPENDING_SELECT wrap it
-// in `strftime(..., 'localtime')` so callers receive the display-timezone
+// `created_at` is stored in UTC; spending_cols! / recent_spending_select! wrap
+// it in `strftime(..., 'localtime')` so callers receive the display-timezone
 // string directly. The display timezone is the process's `TZ` env var.
 
-pub(super) const USER_COLS: &str = "id, name, telegram_id, is_admin, default_account_id";
-pub(super) const ACCOUNT_COLS: &str = "id, name, currency_id, owner_id, iban";
-pub(super) const CATEGORY_COLS: &str = "id, name, sort_order";
-pub(super) const CURRENCY_COLS: &str = "id, currency_code";
-pub(super) const SPENDING_COLS: &str = "id, account_id, amount, category_id, reporter_id, notes, \
-     strftime('%Y-%m-%dT%H:%M:%S', created_at, 'localtime') AS created_at";
+macro_rules! user_cols {
+    () => {
+        "id, name, telegram_id, is_admin, default_account_id"
+    };
+}
+macro_rules! account_cols {
+    () => {
+        "id, name, currency_id, owner_id, iban"
+    };
+}
+macro_rules! category_cols {
+    () => {
+        "id, name"
+    };
+}
+macro_rules! currency_cols {
+    () => {
+        "id, currency_code"
+    };
+}
+macro_rules! spending_cols {
+    () => {
+        "id, account_id, amount, category_id, reporter_id, notes, \
+         strftime('%Y-%m-%dT%H:%M:%S', created_at, 'localtime') AS created_at"
+    };
+}
 
 /// SELECT + FROM + JOINs for `RecentSpending`. Append a WHERE / ORDER BY / LIMIT
 /// at the call site. Note the ORDER BY should use `s.created_at` (raw UTC) for
 /// chronological ordering, not the aliased local-time column.
-pub(super) const RECENT_SPENDING_SELECT: &str = "\
-    SELECT s.id, s.amount, c.currency_code, a.name, a.iban, cat.name, u.name, s.notes, \
-        strftime('%Y-%m-%dT%H:%M:%S', s.created_at, 'localtime') AS created_at_local \
-    FROM spendings s \
-    JOIN accounts a ON s.account_id = a.id \
-    JOIN currencies c ON a.currency_id = c.id \
-    JOIN categories cat ON s.category_id = cat.id \
-    JOIN users u ON s.reporter_id = u.id";
+macro_rules! recent_spending_select {
+    () => {
+        "SELECT s.id, s.amount, c.currency_code, a.name, a.iban, cat.name, u.name, s.notes, \
+             strftime('%Y-%m-%dT%H:%M:%S', s.created_at, 'localtime') AS created_at_local \
+         FROM spendings s \
+         JOIN accounts a ON s.account_id = a.id \
+         JOIN currencies c ON a.currency_id = c.id \
+         JOIN categories cat ON s.category_id = cat.id \
+         JOIN users u ON s.reporter_id = u.id"
+    };
+}
+
+pub(super) use {
+    account_cols, category_cols, currency_cols, recent_spending_select, spending_cols, user_cols,
+};
 
 pub(super) fn row_to_user(row: &Row) -> rusqlite::Result<User> {
     Ok(User {
@@ -101,7 +131,6 @@ pub(super) fn row_to_category(row: &Row) -> rusqlite::Result<Category> {
     Ok(Category {
         id: row.get(0)?,
         name: row.get(1)?,
-        sort_order: row.get(2)?,
     })
 }
 
@@ -1,7 +1,11 @@
-pub const SCHEMA_V1: &str = "
-PRAGMA journal_mode=WAL;
-PRAGMA foreign_keys=ON;
+use super::models::{
+    account_cols, category_cols, currency_cols, recent_spending_select, spending_cols, user_cols,
+};
 
+/// Schema migrations in order: entry `i` upgrades the database to version `i + 1`.
+pub const MIGRATIONS: &[&str] = &[SCHEMA_V1, SCHEMA_V2, SCHEMA_V3, SCHEMA_V4];
+
+const SCHEMA_V1: &str = "
 CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL);
 
 CREATE TABLE IF NOT EXISTS currencies (
@@ -41,11 +45,104 @@ CREATE TABLE IF NOT EXISTS spendings (
     category_id INTEGER NOT NULL,
     reporter_id INTEGER NOT NULL,
     notes       TEXT,
-    -- Stored in UTC. The DAL converts to the process's local time (TZ env var)
-    -- only when reading for display.
+    -- Stored in UTC as exactly 'YYYY-MM-DDTHH:MM:SS' (enforced from V4 on).
+    -- Month queries compare it as text, so any other spelling would sort
+    -- wrong at a boundary. The DAL converts to the process's local time (TZ
+    -- env var) only when reading for display.
     created_at  TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S','now')),
     FOREIGN KEY (account_id) REFERENCES accounts(id),
     FOREIGN KEY (category_id) REFERENCES categories(id),
     FOREIGN KEY (reporter_id) REFERENCES users(id)
 );
 ";
+
+const SCHEMA_V2: &str = "
+-- Month export orders by (created_at, id); with this index SQLite walks it in
+-- index order instead of sorting the result in a temp b-tree.
+CREATE INDEX IF NOT EXISTS idx_spendings_created_at ON spendings(created_at);
+";
+
+const SCHEMA_V3: &str = "
+-- One index per spendings foreign key, with created_at second. The prefix
+-- serves SQLite's FK checks when an account, category or user is deleted or
+-- re-keyed (otherwise a full scan of spendings per parent row); the suffix
+-- lets a per-account / per-category / per-reporter history come out in date
+-- order without a sort.
+CREATE INDEX IF NOT EXISTS idx_spendings_account_created ON spendings(account_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_spendings_category_created ON spendings(category_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_spendings_reporter_created ON spendings(reporter_id, created_at);
+";
+
+const SCHEMA_V4: &str = "
+-- The month range in SELECT_SPENDINGS_IN_MONTH is a plain text comparison,
+-- which only holds if every created_at has the 'YYYY-MM-DDTHH:MM:SS' shape:
+-- a row typed in by hand as '2026-04-30 22:00:00' sorts before
+-- '2026-04-30T22:00:00' and lands in the wrong month. Rewrite existing rows
+-- into that shape and keep later inserts and edits in it. Values strftime
+-- can't parse are left alone.
+UPDATE spendings SET created_at = strftime('%Y-%m-%dT%H:%M:%S', created_at)
+WHERE created_at <> strftime('%Y-%m-%dT%H:%M:%S', created_at);
+
+CREATE TRIGGER IF NOT EXISTS trg_spendings_created_at_insert
+AFTER INSERT ON spendings
+WHEN NEW.created_at <> strftime('%Y-%m-%dT%H:%M:%S', NEW.created_at)
+BEGIN
+    UPDATE spendings SET created_at = strftime('%Y-%m-%dT%H:%M:%S', NEW.created_at)
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_spendings_created_at_update
+AFTER UPDATE OF created_at ON spendings
+WHEN NEW.created_at <> strftime('%Y-%m-%dT%H:%M:%S', NEW.created_at)
+BEGIN
+    UPDATE spendings SET created_at = strftime('%Y-%m-%dT%H:%M:%S', NEW.created_at)
+    WHERE id = NEW.id;
+END;
+";
+
+// Statements that splice in a SELECT list, assembled at compile time so each
+// call hands `prepare_cached` a `&'static str` instead of formatting a fresh
+// `String` just to hash it.
+
+pub const SELECT_USERS: &str = concat!("SELECT ", user_cols!(), " FROM users");
+
+pub const SELECT_ACCOUNTS: &str = concat!("SELECT ", account_cols!(), " FROM accounts");
+
+pub const SELECT_CATEGORIES: &str = concat!(
+    "SELECT ",
+    category_cols!(),
+    " FROM categories ORDER BY sort_order"
+);
+
+pub const SELECT_CURRENCIES: &str =
+    concat!("SELECT ", currency_cols!(), " FROM currencies ORDER BY id");
+
+pub const INSERT_SPENDING: &str = concat!(
+    "INSERT INTO spendings (account_id, amount, category_id, reporter_id, notes) \
+     VALUES (?1, ?2, ?3, ?4, ?5) RETURNING ",
+    spending_cols!()
+);
+
+pub const SELECT_SPENDING_BY_ID: &str =
+    concat!("SELECT ", spending_cols!(), " FROM spendings WHERE id = ?1");
+
+pub const UPDATE_SPENDING: &str = concat!(
+    "UPDATE spendings SET account_id = ?1, amount = ?2, category_id = ?3, notes = ?4 \
+     WHERE id = ?5 RETURNING ",
+    spending_cols!()
+);
+
+/// The local month `?1` ("YYYY-MM") becomes a half-open UTC range on the
+/// stored column (`'utc'` treats its input as local time), so the lookup is
+/// an index range scan on `idx_spendings_created_at` rather than a `strftime`
+/// over every row. The bounds are compared as text, which is sound only
+/// because `SCHEMA_V4` keeps every `created_at` in one fixed format.
+pub const SELECT_SPENDINGS_IN_MONTH: &str = concat!(
+    recent_spending_select!(),
+    " WHERE s.created_at >= strftime('%Y-%m-%dT%H:%M:%S', ?1 || '-01', 'utc') \
+       AND s.created_at < strftime('%Y-%m-%dT%H:%M:%S', ?1 || '-01', '+1 month', 'utc') \
+     ORDER BY s.created_at ASC, s.id ASC"
+);
+
+pub const SELECT_RECENT_SPENDINGS: &str =
+    concat!(recent_spending_select!(), " ORDER BY s.id DESC LIMIT ?1");
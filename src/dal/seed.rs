@@ -2,24 +2,31 @@
 //! the prod database starts empty and is populated by hand once.
 
 use rusqlite::Connection;
+use std::collections::HashMap;
 
 pub const ALICE_TELEGRAM_ID: i64 = 1111111111;
 pub const BOB_TELEGRAM_ID: i64 = 2222222222;
 
 pub fn seed_if_empty(conn: &Connection) {
-    let user_count: i64 = conn
-        .query_row("SELECT COUNT(*) FROM users", [], |row| row.get(0))
-        .unwrap_or(0);
-    if user_count > 0 {
+    let has_users: bool = conn
+        .query_row("SELECT EXISTS(SELECT 1 FROM users)", [], |row| row.get(0))
+        .unwrap_or(false);
+    if has_users {
         return;
     }
 
-    for code in &["EUR", "USD", "BYN"] {
-        conn.execute(
-            "INSERT OR IGNORE INTO currencies (currency_code) VALUES (?1)",
-            [code],
-        )
-        .unwrap();
+    // One transaction for the whole fixture: a single commit instead of one
+    // per row, and each table's INSERT is prepared once and re-executed.
+    let tx = conn.unchecked_transaction().unwrap();
+    let conn = &*tx;
+
+    {
+        let mut insert = conn
+            .prepare("INSERT OR IGNORE INTO currencies (currency_code) VALUES (?1)")
+            .unwrap();
+        for code in &["EUR", "USD", "BYN"] {
+            insert.execute([code]).unwrap();
+        }
     }
 
     conn.execute(
@@ -55,12 +62,13 @@ pub fn seed_if_empty(conn: &Connection) {
         "Жильё (обустройство)",
         "Другое",
     ];
-    for (i, name) in categories.iter().enumerate() {
-        conn.execute(
-            "INSERT OR IGNORE INTO categories (name, sort_order) VALUES (?1, ?2)",
-            rusqlite::params![name, i as i64],
-        )
-        .unwrap();
+    {
+        let mut insert = conn
+            .prepare("INSERT OR IGNORE INTO categories (name, sort_order) VALUES (?1, ?2)")
+            .unwrap();
+        for (i, name) in categories.iter().enumerate() {
+            insert.execute(rusqlite::params![name, i as i64]).unwrap();
+        }
     }
 
     let eur_id: i64 = conn
@@ -81,39 +89,24 @@ pub fn seed_if_empty(conn: &Connection) {
         })
         .unwrap();
 
-    for (name, owner_id, iban) in [
-        ("Account A", alice_id, "TEST00 0000 0000 0000 0001"),
-        ("Account B", alice_id, "TEST00 0000 0000 0000 0002"),
-        ("Account C", bob_id, "TEST00 0000 0000 0000 0003"),
-    ] {
-        conn.execute(
-            "INSERT INTO accounts (name, currency_id, owner_id, iban) VALUES (?1, ?2, ?3, ?4)",
-            rusqlite::params![name, eur_id, owner_id, iban],
-        )
-        .unwrap();
-    }
-
-    let acc_a_id: i64 = conn
-        .query_row(
-            "SELECT id FROM accounts WHERE name = 'Account A'",
-            [],
-            |row| row.get(0),
-        )
-        .unwrap();
-    let acc_b_id: i64 = conn
-        .query_row(
-            "SELECT id FROM accounts WHERE name = 'Account B'",
-            [],
-            |row| row.get(0),
-        )
-        .unwrap();
-    let acc_c_id: i64 = conn
-        .query_row(
-            "SELECT id FROM accounts WHERE name = 'Account C'",
-            [],
-            |row| row.get(0),
-        )
-        .unwrap();
+    // Take the ids straight from the inserts rather than re-selecting by name.
+    let [acc_a_id, acc_b_id, acc_c_id] = {
+        let mut insert = conn
+            .prepare(
+                "INSERT INTO accounts (name, currency_id, owner_id, iban) VALUES (?1, ?2, ?3, ?4)",
+            )
+            .unwrap();
+        [
+            ("Account A", alice_id, "TEST00 0000 0000 0000 0001"),
+            ("Account B", alice_id, "TEST00 0000 0000 0000 0002"),
+            ("Account C", bob_id, "TEST00 0000 0000 0000 0003"),
+        ]
+        .map(|(name, owner_id, iban)| {
+            insert
+                .insert(rusqlite::params![name, eur_id, owner_id, iban])
+                .unwrap()
+        })
+    };
 
     conn.execute(
         "UPDATE users SET default_account_id = ?1 WHERE id = ?2",
@@ -123,12 +116,15 @@ pub fn seed_if_empty(conn: &Connection) {
 
     // Sample spendings. Dated in 2025 so they don't collide with tests that
     // assert on 2026-dated rows. Spread across accounts/categories/reporters.
-    let cat_id = |name: &str| -> i64 {
-        conn.query_row("SELECT id FROM categories WHERE name = ?1", [name], |row| {
-            row.get(0)
-        })
+    // Resolve category names from one snapshot instead of a SELECT per row.
+    let category_ids: HashMap<String, i64> = conn
+        .prepare("SELECT name, id FROM categories")
         .unwrap()
-    };
+        .query_map([], |row| Ok((row.get(0)?, row.get(1)?)))
+        .unwrap()
+        .collect::<rusqlite::Result<_>>()
+        .unwrap();
+    let cat_id = |name: &str| -> i64 { category_ids[name] };
 
     let spendings: [(i64, f64, i64, i64, Option<&str>, &str); 10] = [
         (
@@ -213,12 +209,26 @@ pub fn seed_if_empty(conn: &Connection) {
         ),
     ];
 
-    for (account_id, amount, category_id, reporter_id, notes, created_at) in spendings {
-        conn.execute(
-            "INSERT INTO spendings (account_id, amount, category_id, reporter_id, notes, created_at)
-             VALUES (?1, ?2, ?3, ?4, ?5, ?6)",
-            rusqlite::params![account_id, amount, category_id, reporter_id, notes, created_at],
-        )
-        .unwrap();
+    {
+        let mut insert = conn
+            .prepare(
+                "INSERT INTO spendings (account_id, amount, category_id, reporter_id, notes, created_at)
+                 VALUES (?1, ?2, ?3, ?4, ?5, ?6)",
+            )
+            .unwrap();
+        for (account_id, amount, category_id, reporter_id, notes, created_at) in spendings {
+            insert
+                .execute(rusqlite::params![
+                    account_id,
+                    amount,
+                    category_id,
+                    reporter_id,
+                    notes,
+                    created_at
+                ])
+                .unwrap();
+        }
     }
+
+    tx.commit().unwrap();
 }
@@ -1,10 +1,11 @@
 use std::collections::HashMap;
 use std::sync::Mutex;
+use std::time::{Duration, Instant};
 
 /// Key for drafts: (chat_id, message_id) of the bot's summary reply.
 pub type DraftKey = (i64, i32);
 
-#[derive(Debug, Clone, PartialEq)]
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
 pub enum EditState {
     Summary,
     ChoosingCategory,
@@ -14,7 +15,7 @@ pub enum EditState {
     ConfirmingDelete,
 }
 
-#[derive(Debug, Clone, PartialEq)]
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
 pub enum DraftMode {
     /// New spending — Save inserts a row.
     New,
@@ -34,86 +35,153 @@ pub struct SpendingDraft {
     pub mode: DraftMode,
 }
 
+/// Drafts untouched for this long are dropped on the next `set`. Abandoned
+/// summaries (never saved or cancelled) would otherwise accumulate for the
+/// lifetime of the process.
+const DRAFT_TTL: Duration = Duration::from_secs(24 * 60 * 60);
+
+struct Entry {
+    draft: SpendingDraft,
+    touched_at: Instant,
+}
+
 pub struct DraftStore {
-    drafts: Mutex<HashMap<DraftKey, SpendingDraft>>,
+    ttl: Duration,
+    drafts: Mutex<HashMap<DraftKey, Entry>>,
 }
 
 impl DraftStore {
     pub fn new() -> Self {
+        Self::with_ttl(DRAFT_TTL)
+    }
+
+    fn with_ttl(ttl: Duration) -> Self {
         Self {
+            ttl,
             drafts: Mutex::new(HashMap::new()),
         }
     }
 
+    /// Whether `entry` has gone untouched for the TTL. Expired entries are
+    /// only dropped on the next `set`, so every read treats them as absent.
+    fn expired(&self, entry: &Entry) -> bool {
+        entry.touched_at.elapsed() >= self.ttl
+    }
+
     pub fn get(&self, key: DraftKey) -> Option<SpendingDraft> {
-        self.drafts.lock().unwrap().get(&key).cloned()
+        self.drafts
+            .lock()
+            .unwrap()
+            .get(&key)
+            .filter(|e| !self.expired(e))
+            .map(|e| e.draft.clone())
     }
 
-    pub fn set(&self, key: DraftKey, draft: SpendingDraft) {
-        self.drafts.lock().unwrap().insert(key, draft);
+    /// Whether a draft exists under `key`, without cloning it.
+    pub fn contains(&self, key: DraftKey) -> bool {
+        self.drafts
+            .lock()
+            .unwrap()
+            .get(&key)
+            .is_some_and(|e| !self.expired(e))
     }
 
-    pub fn update_state(&self, key: DraftKey, state: EditState) -> bool {
+    /// Stores a draft, first evicting drafts that have not been touched
+    /// within the TTL.
+    pub fn set(&self, key: DraftKey, draft: SpendingDraft) {
         let mut drafts = self.drafts.lock().unwrap();
-        if let Some(draft) = drafts.get_mut(&key) {
-            draft.edit_state = state;
-            true
-        } else {
-            false
-        }
+        let now = Instant::now();
+        drafts.retain(|_, e| now.duration_since(e.touched_at) < self.ttl);
+        drafts.insert(
+            key,
+            Entry {
+                draft,
+                touched_at: now,
+            },
+        );
     }
 
-    pub fn update_category(&self, key: DraftKey, category_id: i64) {
+    /// Applies `f` to the draft and refreshes its TTL. Returns `None` if the
+    /// draft does not exist.
+    fn modify<R>(&self, key: DraftKey, f: impl FnOnce(&mut SpendingDraft) -> R) -> Option<R> {
         let mut drafts = self.drafts.lock().unwrap();
-        if let Some(draft) = drafts.get_mut(&key) {
-            draft.category_id = category_id;
-            draft.edit_state = EditState::Summary;
-        }
+        let entry = drafts.get_mut(&key).filter(|e| !self.expired(e))?;
+        entry.touched_at = Instant::now();
+        Some(f(&mut entry.draft))
     }
 
-    pub fn update_account(&self, key: DraftKey, account_id: i64) {
-        let mut drafts = self.drafts.lock().unwrap();
-        if let Some(draft) = drafts.get_mut(&key) {
-            draft.account_id = account_id;
-            draft.edit_state = EditState::Summary;
-        }
+    pub fn update_state(&self, key: DraftKey, state: EditState) -> bool {
+        self.modify(key, |d| d.edit_state = state).is_some()
     }
 
-    pub fn update_note(&self, key: DraftKey, note: String) {
-        let mut drafts = self.drafts.lock().unwrap();
-        if let Some(draft) = drafts.get_mut(&key) {
-            draft.notes = Some(note);
-            draft.edit_state = EditState::Summary;
-        }
+    // The setters below return the updated draft so callers can re-render the
+    // summary without a second lookup.
+
+    pub fn update_category(&self, key: DraftKey, category_id: i64) -> Option<SpendingDraft> {
+        self.modify(key, |d| {
+            d.category_id = category_id;
+            d.edit_state = EditState::Summary;
+            d.clone()
+        })
     }
 
-    pub fn update_amount(&self, key: DraftKey, amount: f64) {
-        let mut drafts = self.drafts.lock().unwrap();
-        if let Some(draft) = drafts.get_mut(&key) {
-            draft.amount = amount;
-            draft.edit_state = EditState::Summary;
-        }
+    pub fn update_account(&self, key: DraftKey, account_id: i64) -> Option<SpendingDraft> {
+        self.modify(key, |d| {
+            d.account_id = account_id;
+            d.edit_state = EditState::Summary;
+            d.clone()
+        })
     }
 
-    pub fn remove(&self, key: DraftKey) -> Option<SpendingDraft> {
-        self.drafts.lock().unwrap().remove(&key)
+    pub fn update_note(&self, key: DraftKey, note: String) -> Option<SpendingDraft> {
+        self.modify(key, |d| {
+            d.notes = Some(note);
+            d.edit_state = EditState::Summary;
+            d.clone()
+        })
     }
 
-    /// Find a draft in a given state for a specific user. Returns the key if found.
-    pub fn find_by_state(&self, telegram_id: i64, state: EditState) -> Option<DraftKey> {
+    pub fn update_amount(&self, key: DraftKey, amount: f64) -> Option<SpendingDraft> {
+        self.modify(key, |d| {
+            d.amount = amount;
+            d.edit_state = EditState::Summary;
+            d.clone()
+        })
+    }
+
+    pub fn remove(&self, key: DraftKey) -> Option<SpendingDraft> {
         self.drafts
             .lock()
             .unwrap()
+            .remove(&key)
+            .filter(|e| !self.expired(e))
+            .map(|e| e.draft)
+    }
+
+    /// Keys of the user's drafts waiting for a typed amount and a typed note,
+    /// in that order. Every text message needs both, so they are found in a
+    /// single pass under one lock.
+    pub fn find_pending_input(&self, telegram_id: i64) -> (Option<DraftKey>, Option<DraftKey>) {
+        let drafts = self.drafts.lock().unwrap();
+        let (mut amount_key, mut note_key) = (None, None);
+        for (k, e) in drafts
             .iter()
-            .find(|(_, d)| d.telegram_id == telegram_id && d.edit_state == state)
-            .map(|(k, _)| *k)
+            .filter(|(_, e)| e.draft.telegram_id == telegram_id && !self.expired(e))
+        {
+            match e.draft.edit_state {
+                EditState::EnteringAmount => amount_key = amount_key.or(Some(*k)),
+                EditState::EnteringNote => note_key = note_key.or(Some(*k)),
+                _ => {}
+            }
+        }
+        (amount_key, note_key)
     }
 
     /// Reset a user's draft from any text-entry state back to Summary
     /// (e.g. when a new amount arrives that creates a fresh draft).
     pub fn cancel_pending_input(&self, telegram_id: i64) {
         let mut drafts = self.drafts.lock().unwrap();
-        for draft in drafts.values_mut() {
+        for draft in drafts.values_mut().map(|e| &mut e.draft) {
             if draft.telegram_id == telegram_id
                 && matches!(
                     draft.edit_state,
@@ -236,23 +304,23 @@ mod tests {
     }
 
     #[test]
-    fn test_find_by_state() {
+    fn test_find_pending_input() {
         let store = DraftStore::new();
         store.set(key(1), make_draft());
         store.set(key(2), make_draft());
+        store.set(key(3), make_draft());
+
+        assert_eq!(store.find_pending_input(USER_TG), (None, None));
 
         store.update_state(key(2), EditState::EnteringNote);
+        store.update_state(key(3), EditState::EnteringAmount);
 
         assert_eq!(
-            store.find_by_state(USER_TG, EditState::EnteringNote),
-            Some(key(2))
-        );
-        assert_eq!(
-            store.find_by_state(USER_TG, EditState::ChoosingCategory),
-            None
+            store.find_pending_input(USER_TG),
+            (Some(key(3)), Some(key(2)))
         );
         // Different user — not found
-        assert_eq!(store.find_by_state(999, EditState::EnteringNote), None);
+        assert_eq!(store.find_pending_input(999), (None, None));
     }
 
     #[test]
@@ -281,15 +349,51 @@ mod tests {
         );
     }
 
+    #[test]
+    fn test_set_evicts_expired_drafts() {
+        let store = DraftStore::with_ttl(Duration::ZERO);
+        store.set(key(1), make_draft());
+        store.set(key(2), make_draft());
+
+        // key(1) is dropped from the map, not just hidden from reads.
+        let drafts = store.drafts.lock().unwrap();
+        assert!(!drafts.contains_key(&key(1)));
+        assert!(drafts.contains_key(&key(2)));
+    }
+
+    #[test]
+    fn test_expired_draft_is_absent() {
+        let store = DraftStore::with_ttl(Duration::ZERO);
+        store.set(key(1), make_draft());
+        store.update_state(key(1), EditState::EnteringNote);
+
+        assert!(store.get(key(1)).is_none());
+        assert!(!store.contains(key(1)));
+        assert!(!store.update_state(key(1), EditState::Summary));
+        assert_eq!(store.find_pending_input(USER_TG), (None, None));
+        assert!(store.remove(key(1)).is_none());
+    }
+
     #[test]
     fn test_update_amount() {
         let store = DraftStore::new();
         store.set(key(1), make_draft());
         store.update_state(key(1), EditState::EnteringAmount);
 
-        store.update_amount(key(1), 42.5);
+        let updated = store.update_amount(key(1), 42.5).unwrap();
+        assert_eq!(updated.amount, 42.5);
         let draft = store.get(key(1)).unwrap();
         assert_eq!(draft.amount, 42.5);
         assert_eq!(draft.edit_state, EditState::Summary);
+
+        assert!(store.update_amount(key(999), 1.0).is_none());
+    }
+
+    #[test]
+    fn test_contains() {
+        let store = DraftStore::new();
+        store.set(key(1), make_draft());
+        assert!(store.contains(key(1)));
+        assert!(!store.contains(key(2)));
     }
 }
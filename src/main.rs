@@ -4,14 +4,26 @@ mod domain;
 
 use std::env;
 
-#[tokio::main]
+// Pinned rather than one worker per CPU: the DAL is synchronous, so at least
+// two workers keep one slow DB call from stalling every other update even on
+// a single-core host, and more would just sit idle for a family bot.
+#[tokio::main(worker_threads = 2)]
 async fn main() {
     dotenv::dotenv().ok();
-    env_logger::init();
+    let mut logger = env_logger::Builder::from_default_env();
+    // systemd sets JOURNAL_STREAM when stdout goes to journald, which stamps
+    // every line itself; skip formatting a second timestamp per record.
+    if env::var_os("JOURNAL_STREAM").is_some() {
+        logger.format_timestamp(None);
+    }
+    logger.init();
 
+    // Read the token before touching the DB, so a misconfigured unit fails
+    // fast without opening (or creating and migrating) the database file.
+    let bot = bot::bot_from_env();
     let db_path = env::var("DATABASE_PATH").unwrap_or_else(|_| "spending_tracker.db".to_string());
     let db = dal::Db::open(&db_path).expect("Failed to open database");
     let drafts = domain::DraftStore::new();
 
-    bot::run(db, drafts).await;
+    bot::run(bot, db, drafts).await;
 }